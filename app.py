@@ -1,10 +1,25 @@
 import os
-import requests
+import re
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+import uuid
+import functools
+import operator
+import diskcache
+import numpy as np
+import orjson
+import httpx
+from tenacity import retry, retry_if_exception, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 import openai
 from dotenv import load_dotenv
 import dash
-from dash import html, dcc, Input, Output
+from dash import html, dcc, Input, Output, DiskcacheManager
 from dash.dependencies import State
+from flask.json.provider import DefaultJSONProvider
+import plotly.io.json
 import logging
 
 # Configure logging
@@ -14,6 +29,13 @@ logging.basicConfig(level=logging.DEBUG)
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+SUMMARIZER_MODEL = os.getenv("SUMMARIZER_MODEL", "gpt-4o-mini")
+# Optional OpenAI-compatible endpoint, e.g. a local vLLM server at http://localhost:8000/v1
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# Disk-backed cache shared between the web server and background callback workers,
+# which run in separate processes
+CACHE = diskcache.Cache(os.getenv("CACHE_DIR", "./.cache"))
 
 # Define categories and their search queries
 CATEGORIES = {
@@ -25,69 +47,357 @@ CATEGORIES = {
     "Public Health": "public health OR disease prevention"
 }
 
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+# Split a category query like "a OR 'b c'" into its individual search terms
+def extract_terms(query):
+    return [term.strip().strip("'\"") for term in query.split(" OR ") if term.strip()]
+
+# Match a word along with simple plural forms, e.g. "trial" also matches "trials"
+def _word_pattern(word):
+    stem = word.lower()
+    if len(stem) > 3 and stem.endswith('s') and not stem.endswith('ss'):
+        stem = stem[:-1]
+    return rf"\b{re.escape(stem)}(?:s|es)?\b"
+
+# NewsAPI matches the words of an unquoted term independently, so a term matches
+# when all of its words appear anywhere in the text (one lookahead per word)
+def _term_pattern(term):
+    return "".join(f"(?=.*{_word_pattern(word)})" for word in term.split())
+
+# Precompiled per-category matchers used to classify articles from a combined query
+CAT_RE = {
+    cat: re.compile("^(?:" + "|".join(_term_pattern(term) for term in extract_terms(q)) + ")", re.I | re.S)
+    for cat, q in CATEGORIES.items()
+}
+
+# Assign an article to the first selected category whose terms it mentions
+def classify_article(article, categories):
+    text = (article.get('title') or "") + " " + (article.get('description') or "")
+    for cat in categories:
+        if CAT_RE[cat].search(text):
+            return cat
+    return "Uncategorized"
+
+# HTTP client for NewsAPI. Each fetch is a single request made from a forked
+# background-callback worker, so connections are not reused across jobs. Retries
+# are handled by _get_news so they back off with jitter.
+NEWS_CLIENT = httpx.Client(
+    timeout=httpx.Timeout(10.0, connect=3.05),
+    limits=httpx.Limits(max_connections=4)
+)
+
+# Stay under NewsAPI's developer quota of 100 requests/day
+NEWS_API_DAILY_LIMIT = int(os.getenv("NEWS_API_DAILY_LIMIT", "90"))
+
+# Count a NewsAPI request against today's quota, returning False once it is used up.
+# The counter lives in CACHE so it is shared by all worker processes.
+def _take_news_api_quota():
+    key = f"newsapi-quota:{time.strftime('%Y-%m-%d', time.gmtime())}"
+    CACHE.add(key, 0, expire=2 * 24 * 3600)
+    return CACHE.incr(key) <= NEWS_API_DAILY_LIMIT
+
+# Retry throttling, server errors and network failures, but not e.g. a bad API key
+def _is_retryable(exc):
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, httpx.TransportError)
+
+@retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=wait_random_exponential(multiplier=0.5, max=10),
+    stop=stop_after_attempt(4),
+    reraise=True
+)
+def _get_news(params):
+    if not _take_news_api_quota():
+        raise RuntimeError("NewsAPI daily request limit reached")
+    response = NEWS_CLIENT.get(NEWS_API_URL, params=params)
+    response.raise_for_status()
+    return response.json().get('articles', [])
+
+# Fetch articles for a single NewsAPI query
+def _fetch_one(category, query, page_size=5):
+    params = {
+        "q": query,
+        "apiKey": NEWS_API_KEY,
+        "language": "en",
+        "sortBy": "publishedAt",
+        "pageSize": page_size
+    }
+    
+    logging.debug(f"Fetching news for {category} with query: {query}")
+    try:
+        articles = _get_news(params)
+    except Exception as e:
+        logging.error(f"Error fetching news for {category}: {str(e)}")
+        return []
+    
+    # Add category to each article
+    for article in articles:
+        article['category'] = category
+    
+    logging.debug(f"Found {len(articles)} articles for {category}")
+    return articles
+
+NEWS_CACHE_TTL = 120  # seconds before a cached result is refreshed
+NEWS_CACHE_MAX_AGE = 3600  # seconds a stale result may still be served if a refresh fails
+
+# Cache results in CACHE keyed on the normalized inputs. Fresh entries are returned
+# directly; stale ones are refreshed synchronously (callers already run in a
+# background callback worker, which Dash kills once its result is read, so a refresh
+# thread would not survive), falling back to the stale value if the refresh comes
+# back empty, e.g. on a fetch error or once the daily quota is used up.
+def stale_if_error(ttl, max_age):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(selected_categories, search_term=None):
+            key = "news:" + json.dumps([
+                sorted(selected_categories or []),
+                (search_term or "").strip()
+            ])
+            
+            entry = CACHE.get(key)
+            if entry is not None and time.time() - entry[0] < ttl:
+                return entry[1]
+            
+            value = func(selected_categories, search_term)
+            if value:  # Don't cache empty results, which are often fetch errors
+                CACHE.set(key, (time.time(), value), expire=max_age)
+                return value
+            return entry[1] if entry is not None else value
+        return wrapper
+    return decorator
+
+# Build the NewsAPI query for a set of categories (in CATEGORIES order) and search term.
+# Search terms are not lowercased since NewsAPI only honours uppercase AND/OR/NOT.
+@functools.lru_cache(maxsize=64)
+def _build_query(cats_tuple, search_term):
+    # If search term is provided, include it in the query
+    search_query = f"{search_term} AND " if search_term else ""
+    
+    # If no categories selected, just use the search term
+    if not cats_tuple:
+        return f"{search_query}(healthcare OR health OR medical OR EHR OR EMR OR technology OR business)"
+    
+    # One query for the union of all category queries; articles are classified locally
+    combined_q = " OR ".join(f"({CATEGORIES[cat]})" for cat in cats_tuple)
+    return f"{search_query}({combined_q}) AND (healthcare OR health OR medical OR EHR OR EMR)"
+
 # Function to fetch recent health news
+@stale_if_error(NEWS_CACHE_TTL, NEWS_CACHE_MAX_AGE)
 def fetch_health_news(selected_categories, search_term=None):
-    url = "https://newsapi.org/v2/everything"
-    all_articles = []
+    search_term = (search_term or "").strip()
     
     # If no categories selected and no search term, return empty list
-    if not selected_categories and not (search_term and search_term.strip()):
+    if not selected_categories and not search_term:
         return []
     
-    # If search term is provided, include it in the query
-    search_query = f"{search_term} AND " if (search_term and search_term.strip()) else ""
+    # Keep CATEGORIES order so classification doesn't depend on selection order
+    categories = tuple(cat for cat in CATEGORIES if cat in (selected_categories or []))
+    if selected_categories and not categories:
+        return []
     
-    # If no categories selected, just use the search term
-    if not selected_categories:
-        categories = ["Search Results"]
-        query = f"{search_query}(healthcare OR health OR medical OR EHR OR EMR OR technology OR business)"
+    query = _build_query(categories, search_term)
+    if not categories:
+        all_articles = _fetch_one("Search Results", query)
     else:
-        categories = selected_categories
-        # Build query with search term (if any) and categories
-        query = search_query + " OR ".join([f"({CATEGORIES[cat]})" for cat in categories if cat in CATEGORIES])
-        query += " AND (healthcare OR health OR medical OR EHR OR EMR)"
-    
-    # Fetch articles
-    for category in categories:
-        # Skip if category doesn't exist (for search-only queries)
-        if category != "Search Results" and category not in CATEGORIES:
-            continue
-        
-        params = {
-            "q": query,
-            "apiKey": NEWS_API_KEY,
-            "language": "en",
-            "sortBy": "publishedAt",
-            "pageSize": 5  # Limit to 5 articles for search, 3 for categories
-        }
-        
-        logging.debug(f"Fetching news with query: {query}")
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            articles = response.json().get('articles', [])
-            
-            # Add category to each article
-            for article in articles:
-                article['category'] = category
-                all_articles.append(article)
-            
-            logging.debug(f"Found {len(articles)} articles")
-                
-        except Exception as e:
-            logging.error(f"Error fetching news: {str(e)}")
-            continue
+        all_articles = _fetch_one("Uncategorized", query, page_size=25)
+        for article in all_articles:
+            article['category'] = classify_article(article, categories)
     
-    # Sort all articles by published date (newest first)
-    all_articles.sort(key=lambda x: x.get('publishedAt', ''), reverse=True)
+    # Sort all articles by published date (newest first), computing each key once
+    keyed = [(a.get('publishedAt') or '', a) for a in all_articles]
+    keyed.sort(key=operator.itemgetter(0), reverse=True)
+    all_articles = [a for _, a in keyed]
     
     return all_articles
 
+# Retry OpenAI calls on rate limits, timeouts, connection failures and 5xx errors,
+# backing off with jitter. This is the only retry layer: the client has max_retries=0.
+openai_retry = retry(
+    retry=retry_if_exception_type((openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)),
+    wait=wait_random_exponential(multiplier=0.5, max=10),
+    stop=stop_after_attempt(4),
+    reraise=True
+)
+
+@openai_retry
+def _create_completion(client, **kwargs):
+    return client.chat.completions.create(**kwargs)
+
+@openai_retry
+def _create_embedding(client, **kwargs):
+    return client.embeddings.create(**kwargs)
+
+# Semantic cache of summaries keyed on prompt embeddings. Vectors live in one
+# normalized matrix so a lookup is a single matmul; SQLite persists entries
+# across restarts.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+# OpenAI-compatible servers (e.g. vLLM) usually lack the default embedding model,
+# so only use the cache there when an embedding model is configured explicitly
+SEMANTIC_CACHE_ENABLED = not OPENAI_BASE_URL or bool(os.getenv("EMBEDDING_MODEL"))
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", ".semantic_cache.db")
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_MAX_ENTRIES = 500
+SEMANTIC_CACHE_TTL = 600  # seconds; older summaries may describe different articles
+
+_semantic_lock = threading.Lock()
+_semantic_pid = None
+
+# (Re)load the cache from SQLite in each process, since background callbacks run in
+# forked workers that must not share the parent's connection or miss newer entries
+def _ensure_semantic_cache():
+    global _semantic_pid, _semantic_db, _semantic_ids, _semantic_summaries, _semantic_last_used, _semantic_created_at, _semantic_vecs
+    
+    if _semantic_pid == os.getpid():
+        return
+    
+    _semantic_db = sqlite3.connect(SEMANTIC_CACHE_PATH, check_same_thread=False)
+    _semantic_db.execute(
+        "CREATE TABLE IF NOT EXISTS summaries "
+        "(id INTEGER PRIMARY KEY, embedding BLOB NOT NULL, summary TEXT NOT NULL, last_used REAL NOT NULL, "
+        "created_at REAL NOT NULL DEFAULT 0)"
+    )
+    columns = [row[1] for row in _semantic_db.execute("PRAGMA table_info(summaries)")]
+    if 'created_at' not in columns:
+        # Entries from before created_at was tracked are treated as expired
+        _semantic_db.execute("ALTER TABLE summaries ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+    _semantic_db.execute("DELETE FROM summaries WHERE created_at < ?", (time.time() - SEMANTIC_CACHE_TTL,))
+    _semantic_db.commit()
+    
+    rows = _semantic_db.execute("SELECT id, embedding, summary, last_used, created_at FROM summaries").fetchall()
+    _semantic_ids = [row[0] for row in rows]
+    _semantic_summaries = [row[2] for row in rows]
+    _semantic_last_used = [row[3] for row in rows]
+    _semantic_created_at = np.array([row[4] for row in rows], dtype=np.float64)
+    _semantic_vecs = (
+        np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+        if rows else np.empty((0, 0), dtype=np.float32)
+    )
+    _semantic_pid = os.getpid()
+
+# Embed the prompt and return (normalized vector, cached summary or None)
+def _semantic_cache_lookup(client, content):
+    response = _create_embedding(client, model=EMBEDDING_MODEL, input=content)
+    vec = np.asarray(response.data[0].embedding, dtype=np.float32)
+    vec /= np.linalg.norm(vec)
+    
+    with _semantic_lock:
+        _ensure_semantic_cache()
+        if not _semantic_summaries or _semantic_vecs.shape[1] != vec.shape[0]:
+            return vec, None
+        sims = _semantic_vecs @ vec
+        sims[_semantic_created_at < time.time() - SEMANTIC_CACHE_TTL] = -1.0  # Ignore expired entries
+        best = int(sims.argmax())
+        if sims[best] < SEMANTIC_CACHE_THRESHOLD:
+            return vec, None
+        
+        logging.debug(f"Semantic cache hit (similarity {sims[best]:.3f})")
+        _semantic_last_used[best] = time.time()
+        _semantic_db.execute(
+            "UPDATE summaries SET last_used = ? WHERE id = ?",
+            (_semantic_last_used[best], _semantic_ids[best])
+        )
+        _semantic_db.commit()
+        return vec, _semantic_summaries[best]
+
+# Add a summary to the semantic cache, evicting the least recently used entry when full
+def _semantic_cache_store(vec, summary):
+    global _semantic_vecs, _semantic_created_at
+    
+    with _semantic_lock:
+        _ensure_semantic_cache()
+        if _semantic_summaries and _semantic_vecs.shape[1] != vec.shape[0]:
+            return
+        
+        if len(_semantic_summaries) >= SEMANTIC_CACHE_MAX_ENTRIES:
+            oldest = int(np.argmin(_semantic_last_used))
+            _semantic_db.execute("DELETE FROM summaries WHERE id = ?", (_semantic_ids[oldest],))
+            _semantic_vecs = np.delete(_semantic_vecs, oldest, axis=0)
+            _semantic_created_at = np.delete(_semantic_created_at, oldest)
+            del _semantic_ids[oldest], _semantic_summaries[oldest], _semantic_last_used[oldest]
+        
+        now = time.time()
+        cursor = _semantic_db.execute(
+            "INSERT INTO summaries (embedding, summary, last_used, created_at) VALUES (?, ?, ?, ?)",
+            (vec.tobytes(), summary, now, now)
+        )
+        _semantic_db.commit()
+        _semantic_ids.append(cursor.lastrowid)
+        _semantic_summaries.append(summary)
+        _semantic_last_used.append(now)
+        _semantic_created_at = np.append(_semantic_created_at, now)
+        _semantic_vecs = np.vstack([_semantic_vecs, vec]) if _semantic_vecs.size else vec[np.newaxis, :]
+
+# Exact-match cache of summaries keyed on a hash of the articles' titles and descriptions
+SUMMARY_CACHE_TTL = 600  # seconds
+
+def _articles_key(articles):
+    pairs = sorted((a.get('title') or '', a.get('description') or '') for a in articles)
+    return hashlib.sha256(json.dumps(pairs).encode()).hexdigest()
+
+# Partial summaries being streamed from OpenAI live in CACHE under this key prefix
+SUMMARY_STREAM_PREFIX = "summary-stream:"
+STREAM_PUBLISH_INTERVAL = 0.25  # seconds; the UI polls every 300 ms
+
+# OpenAI client created on first use, so a missing API key only breaks summaries, not
+# app startup. Each summary runs in a forked background-callback worker, so this is one
+# client per summary, shared by its embedding and chat calls, not across summaries.
+@functools.lru_cache(maxsize=None)
+def get_openai_client():
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY is not set")
+    return openai.OpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        timeout=30.0,
+        max_retries=0,  # Retries are handled by openai_retry
+        http_client=httpx.Client(limits=httpx.Limits(max_connections=10, max_keepalive_connections=10))
+    )
+
+# Drop articles whose URL (or title, without a URL) has already been seen
+def dedupe_articles(articles):
+    seen = set()
+    deduped = []
+    for article in articles:
+        k = article.get('url') or article.get('title')
+        if k and k not in seen:
+            seen.add(k)
+            deduped.append(article)
+    return deduped
+
+# Up to this many articles are listed directly instead of summarized by the model
+SHORT_LIST_MAX_ARTICLES = 2
+
+# One bullet per article: the title, followed by the description when there is one
+def list_articles(articles):
+    lines = []
+    for a in articles:
+        title = a.get('title') or ''
+        description = a.get('description') or ''
+        lines.append(f"• {title}: {description}" if description else f"• {title}")
+    return "\n".join(lines)
+
 # Function to summarize news using ChatGPT
-def summarize_news(articles):
+def summarize_news(articles, stream_id=None):
     if not articles:
         return "No recent news found."
     
+    # Drop duplicate articles so the prompt doesn't pay for the same story twice
+    articles = dedupe_articles(articles)
+    
+    # With only a couple of articles, listing them beats waiting on an LLM round trip
+    if len(articles) <= SHORT_LIST_MAX_ARTICLES:
+        return list_articles(articles)
+    
+    # Identical articles to a recent call skip the OpenAI round trips entirely
+    key = f"summary:{_articles_key(articles)}"
+    cached_summary = CACHE.get(key)
+    if cached_summary is not None:
+        return cached_summary
+    
     # Group articles by category
     articles_by_category = {}
     for article in articles:
@@ -97,48 +407,101 @@ def summarize_news(articles):
         articles_by_category[category].append(article)
     
     # Create a structured content string with categories
-    content = "Please summarize the following news articles. For each article, provide a concise bullet point that captures the main point. Focus on the key information that would be relevant to healthcare professionals and IT staff. If the article is about a specific company or technology, mention that. Keep each bullet point to 1-2 sentences maximum.\n\n"
+    parts = ["One 1-2 sentence bullet per article, leading with any company or technology named.\n\n"]
     
     for category, category_articles in articles_by_category.items():
-        content += f"## {category}\n"
+        parts.append(f"## {category}\n")
         for article in category_articles[:5]:  # Limit to 5 articles per category
             title = article.get('title', 'No title')
-            description = article.get('description', 'No description available')
-            content += f"Title: {title}\nDescription: {description}\n\n"
+            description = (article.get('description') or 'No description available')[:200]  # Long descriptions rarely change the summary
+            parts.append(f"Title: {title}\nDescription: {description}\n\n")
+    
+    content = "".join(parts)
     
-    # Initialize the OpenAI client
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
+    # Return a cached summary if a near-identical prompt was summarized before
+    vec = None
+    if SEMANTIC_CACHE_ENABLED:
+        try:
+            vec, cached_summary = _semantic_cache_lookup(get_openai_client(), content)
+            if cached_summary is not None:
+                return cached_summary
+        except Exception as e:
+            logging.error(f"Error checking semantic cache: {str(e)}")
     
-    # Create a chat completion
+    # Clear any text left over from this page's previous summary
+    if stream_id:
+        CACHE.delete(SUMMARY_STREAM_PREFIX + stream_id)
+    
+    # Create a streamed chat completion so partial text can be shown as it arrives
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        stream = _create_completion(
+            get_openai_client(),
+            model=SUMMARIZER_MODEL,
             messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes news articles in a clear, concise bullet-point format. Focus on extracting the most important information from each article and present it in an easy-to-scan format. Each bullet point should be 1-2 sentences maximum. If the article is about a specific company, technology, or development, highlight that at the beginning of the bullet point."},
+                {"role": "system", "content": "Summarize the user's healthcare IT news by category in concise bullets."},
                 {"role": "user", "content": content}
             ],
-            temperature=0.3  # Lower temperature for more focused, deterministic output
+            temperature=0.3,  # Lower temperature for more focused, deterministic output
+            max_tokens=400,  # Cap output length to bound generation latency
+            stream=True
         )
         
-        # Extract and format the response content
-        summary = response.choices[0].message.content
+        # Accumulate the streamed tokens, publishing the partial text for the UI at most
+        # every STREAM_PUBLISH_INTERVAL seconds or when a line completes
+        buf = []
+        last_published = time.monotonic()
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            buf.append(delta)
+            if stream_id and ("\n" in delta or time.monotonic() - last_published >= STREAM_PUBLISH_INTERVAL):
+                CACHE.set(SUMMARY_STREAM_PREFIX + stream_id, "".join(buf), expire=60)
+                last_published = time.monotonic()
+        summary = "".join(buf)
+        if stream_id:
+            CACHE.set(SUMMARY_STREAM_PREFIX + stream_id, summary, expire=60)
         
         # Ensure the summary is properly formatted with bullet points
         if not summary.startswith(('•', '-', '*')):
             # If the response doesn't start with bullets, add them
             points = [p.strip() for p in summary.split('\n') if p.strip()]
             summary = '\n'.join(f"• {p}" for p in points)
+        
+        if vec is not None:
+            _semantic_cache_store(vec, summary)
+        
+        CACHE.set(key, summary, expire=SUMMARY_CACHE_TTL)
             
         return summary
         
     except Exception as e:
         logging.error(f"Error generating summary: {str(e)}")
+        if stream_id:
+            CACHE.delete(SUMMARY_STREAM_PREFIX + stream_id)  # Don't let partial text replace the error
         return "Error generating summary. Please try again later."
 
-# Initialize Dash app
-app = dash.Dash(__name__)
+# Category checklist options, built once rather than on every layout render
+_CHECKLIST_OPTIONS = [{'label': cat, 'value': cat} for cat in CATEGORIES]
+
+# Initialize Dash app; long-running callbacks execute in background workers
+background_callback_manager = DiskcacheManager(CACHE)
+app = dash.Dash(__name__, background_callback_manager=background_callback_manager)
 
-app.layout = html.Div([
+# Serialize JSON with orjson: Dash encodes component trees through plotly's JSON
+# engine, and anything returned through Flask goes through the app's JSON provider
+plotly.io.json.config.default_engine = "orjson"
+
+class ORJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+app.server.json = ORJSONProvider(app.server)
+
+LAYOUT = html.Div([
     html.Div([
         html.H1("Healthcare News Summarizer", style={'textAlign': 'center', 'color': '#2c3e50'}),
         
@@ -166,7 +529,7 @@ app.layout = html.Div([
                 html.H3("Or Select Categories:", style={'marginBottom': '10px'}),
                 dcc.Checklist(
                     id='category-selector',
-                    options=[{'label': cat, 'value': cat} for cat in CATEGORIES.keys()],
+                    options=_CHECKLIST_OPTIONS,
                     value=[],
                     labelStyle={
                         'display': 'inline-block',  # Changed from 'block' to 'inline-block'
@@ -223,12 +586,19 @@ app.layout = html.Div([
             style={'marginTop': '20px'},
             children=html.Div(id="loading-output-1"),
         ),
+        html.Div(
+            id='loading-text',
+            style={'display': 'none'}
+        ),
         
         html.Div(id='news-output', style={'marginTop': '30px'}),
         html.Div(id='summary-output', style={'marginTop': '30px'}),
         
         # Store for articles data
-        dcc.Store(id='articles-store')
+        dcc.Store(id='articles-store'),
+        
+        # Polls the partially streamed summary while a fetch is running
+        dcc.Interval(id='summary-stream-interval', interval=300, disabled=True)
     ], style={
         'fontFamily': 'Arial, sans-serif',
         'maxWidth': '1200px',
@@ -238,6 +608,151 @@ app.layout = html.Div([
     })
 ])
 
+# Give each page load its own stream id so partial summaries reach the right client
+def serve_layout():
+    return html.Div([LAYOUT, dcc.Store(id='stream-id', data=str(uuid.uuid4()))])
+
+app.layout = serve_layout
+
+# Styles for rendered articles and summaries, shared across renders
+_CARD_STYLE = {
+    'backgroundColor': 'white',
+    'padding': '25px',
+    'borderRadius': '8px',
+    'boxShadow': '0 2px 10px rgba(0,0,0,0.05)',
+    'marginBottom': '20px',
+    'transition': 'transform 0.2s, box-shadow 0.2s',
+    ':hover': {
+        'transform': 'translateY(-2px)',
+        'boxShadow': '0 4px 15px rgba(0,0,0,0.1)'
+    }
+}
+
+_BADGE_STYLE = {
+    'background-color': '#4a89dc',
+    'color': 'white',
+    'padding': '4px 12px',
+    'border-radius': '12px',
+    'font-size': '0.8em',
+    'fontWeight': '500',
+    'display': 'inline-block',
+    'marginBottom': '10px'
+}
+
+_TITLE_STYLE = {
+    'margin': '0 0 10px 0',
+    'color': '#2c3e50',
+    'fontSize': '1.3em',
+    'lineHeight': '1.4'
+}
+
+_DESC_STYLE = {
+    'color': '#555',
+    'margin': '0 0 15px 0',
+    'lineHeight': '1.6'
+}
+
+_LINK_STYLE = {
+    'color': '#4a89dc',
+    'textDecoration': 'none',
+    'fontWeight': '500',
+    'display': 'inline-block',
+    'transition': 'all 0.2s',
+    ':hover': {
+        'color': '#2a6fc9',
+        'textDecoration': 'underline'
+    }
+}
+
+_LINK_WRAP_STYLE = {'marginBottom': '25px'}
+
+_HR_STYLE = {
+    'border': 'none',
+    'height': '1px',
+    'backgroundColor': '#eee',
+    'margin': '20px 0'
+}
+
+_SUMMARY_ITEM_STYLE = {'marginBottom': '10px'}
+
+_SUMMARY_HEADING_STYLE = {
+    'margin': '30px 0 20px 0',
+    'color': '#2c3e50',
+    'paddingBottom': '10px',
+    'borderBottom': '2px solid #f0f0f0'
+}
+
+_SUMMARY_LIST_STYLE = {
+    'listStyleType': 'none',
+    'paddingLeft': '15px',
+    'margin': '0',
+    'fontSize': '1.1em',
+    'lineHeight': '1.7',
+    'color': '#333'
+}
+
+_SUMMARY_BOX_STYLE = {
+    'backgroundColor': 'white',
+    'padding': '25px',
+    'borderRadius': '8px',
+    'boxShadow': '0 2px 10px rgba(0,0,0,0.05)',
+    'borderLeft': '4px solid #0d6efd',
+    'fontSize': '16px',
+    'lineHeight': '1.6',
+    'marginTop': '20px'
+}
+
+# Render one article as a card with its category label, title, description and link
+def _render_article(article):
+    return html.Div([
+        # Category/Search label
+        html.Div([
+            html.Span(article['category'], style=_BADGE_STYLE),
+        ]),
+        
+        # Article title
+        html.H3(article.get('title', 'No title'), style=_TITLE_STYLE),
+        
+        # Article description
+        html.P(article.get('description', 'No description available'), style=_DESC_STYLE),
+        
+        # Read more link
+        html.Div(
+            html.A(
+                'Read full article →', 
+                href=article.get('url', '#'), 
+                target='_blank',
+                style=_LINK_STYLE
+            ),
+            style=_LINK_WRAP_STYLE
+        ),
+        
+        # Divider
+        html.Hr(style=_HR_STYLE)
+    ], style=_CARD_STYLE)
+
+# Format a (possibly partial) summary as a styled bullet list
+def _render_summary(summary, heading="AI-Generated Summary"):
+    # Format the summary with proper line breaks and bullet points
+    summary_content = []
+    if summary:
+        # Split the summary into lines and format as list items
+        lines = [line.strip() for line in summary.split('\n') if line.strip()]
+        for line in lines:
+            # Remove any existing bullet points and add our own consistent ones
+            clean_line = line.lstrip('•-* ').strip()
+            if clean_line:  # Only add non-empty lines
+                summary_content.append(html.Li(clean_line, style=_SUMMARY_ITEM_STYLE))
+    
+    # Create the summary output with proper styling
+    return html.Div([
+        html.H3(heading, style=_SUMMARY_HEADING_STYLE),
+        html.Div(
+            html.Ul(summary_content, style=_SUMMARY_LIST_STYLE),
+            style=_SUMMARY_BOX_STYLE
+        )
+    ]) if summary_content else html.Div()
+
 # Enable/disable fetch button based on selection or search term
 @app.callback(
     [Output('fetch-news', 'style'),
@@ -282,6 +797,14 @@ def update_button(selected_categories, search_term):
     
     return button_style, not has_input
 
+# Shown while a fetch is running in the background
+_LOADING_TEXT_STYLE = {
+    'display': 'block',
+    'marginTop': '20px',
+    'textAlign': 'center',
+    'color': '#555'
+}
+
 # Fetch and display news
 @app.callback(
     [Output('news-output', 'children'),
@@ -289,10 +812,18 @@ def update_button(selected_categories, search_term):
      Output('articles-store', 'data')],
     [Input('fetch-news', 'n_clicks')],
     [State('category-selector', 'value'),
-     State('search-term', 'value')],
+     State('search-term', 'value'),
+     State('stream-id', 'data')],
+    background=True,
+    progress=[Output('loading-text', 'children')],
+    running=[
+        (Output('fetch-news', 'disabled'), True, False),
+        (Output('loading-text', 'style'), _LOADING_TEXT_STYLE, {'display': 'none'}),
+        (Output('summary-stream-interval', 'disabled'), False, True)
+    ],
     prevent_initial_call=True
 )
-def fetch_and_display_news(n_clicks, selected_categories, search_term):
+def fetch_and_display_news(set_progress, n_clicks, selected_categories, search_term, stream_id):
     # Get the callback context to see what triggered the update
     ctx = dash.callback_context
     if not ctx.triggered:
@@ -316,146 +847,23 @@ def fetch_and_display_news(n_clicks, selected_categories, search_term):
     
     try:
         # Fetch articles based on selection or search
+        set_progress("Fetching news...")
         articles = fetch_health_news(selected_categories or [], search_term)
         
         if not articles:
             return "No articles found. Please try different categories or search terms.", "", None
         
         # Display articles with category labels
-        news_output = []
-        for article in articles:
-            news_output.append(
-                html.Div([
-                    # Category/Search label
-                    html.Div([
-                        html.Span(
-                            article['category'],
-                            style={
-                                'background-color': '#4a89dc',
-                                'color': 'white',
-                                'padding': '4px 12px',
-                                'border-radius': '12px',
-                                'font-size': '0.8em',
-                                'fontWeight': '500',
-                                'display': 'inline-block',
-                                'marginBottom': '10px'
-                            }
-                        ),
-                    ]),
-                    
-                    # Article title
-                    html.H3(
-                        article.get('title', 'No title'), 
-                        style={
-                            'margin': '0 0 10px 0',
-                            'color': '#2c3e50',
-                            'fontSize': '1.3em',
-                            'lineHeight': '1.4'
-                        }
-                    ),
-                    
-                    # Article description
-                    html.P(
-                        article.get('description', 'No description available'),
-                        style={
-                            'color': '#555',
-                            'margin': '0 0 15px 0',
-                            'lineHeight': '1.6'
-                        }
-                    ),
-                    
-                    # Read more link
-                    html.Div(
-                        html.A(
-                            'Read full article →', 
-                            href=article.get('url', '#'), 
-                            target='_blank',
-                            style={
-                                'color': '#4a89dc',
-                                'textDecoration': 'none',
-                                'fontWeight': '500',
-                                'display': 'inline-block',
-                                'transition': 'all 0.2s',
-                                ':hover': {
-                                    'color': '#2a6fc9',
-                                    'textDecoration': 'underline'
-                                }
-                            }
-                        ),
-                        style={'marginBottom': '25px'}
-                    ),
-                    
-                    # Divider
-                    html.Hr(style={
-                        'border': 'none',
-                        'height': '1px',
-                        'backgroundColor': '#eee',
-                        'margin': '20px 0'
-                    })
-                ], 
-                style={
-                    'backgroundColor': 'white',
-                    'padding': '25px',
-                    'borderRadius': '8px',
-                    'boxShadow': '0 2px 10px rgba(0,0,0,0.05)',
-                    'marginBottom': '20px',
-                    'transition': 'transform 0.2s, box-shadow 0.2s',
-                    ':hover': {
-                        'transform': 'translateY(-2px)',
-                        'boxShadow': '0 4px 15px rgba(0,0,0,0.1)'
-                    }
-                })
-            )
+        news_output = [_render_article(article) for article in articles]
         
-        # Generate summary of all articles
-        summary = summarize_news(articles)
-        
-        # Format the summary with proper line breaks and bullet points
-        summary_content = []
-        if summary:
-            # Split the summary into lines and format as list items
-            lines = [line.strip() for line in summary.split('\n') if line.strip()]
-            for line in lines:
-                # Remove any existing bullet points and add our own consistent ones
-                clean_line = line.lstrip('•-* ').strip()
-                if clean_line:  # Only add non-empty lines
-                    summary_content.append(html.Li(clean_line, style={'marginBottom': '10px'}))
-        
-        # Create the summary output with proper styling
-        summary_output = html.Div([
-            html.H3(
-                "AI-Generated Summary", 
-                style={
-                    'margin': '30px 0 20px 0',
-                    'color': '#2c3e50',
-                    'paddingBottom': '10px',
-                    'borderBottom': '2px solid #f0f0f0'
-                }
-            ),
-            html.Div(
-                html.Ul(
-                    summary_content,
-                    style={
-                        'listStyleType': 'none',
-                        'paddingLeft': '15px',
-                        'margin': '0',
-                        'fontSize': '1.1em',
-                        'lineHeight': '1.7',
-                        'color': '#333'
-                    }
-                ),
-                style={
-                    'backgroundColor': 'white',
-                    'padding': '25px',
-                    'borderRadius': '8px',
-                    'boxShadow': '0 2px 10px rgba(0,0,0,0.05)',
-                    'borderLeft': '4px solid #0d6efd',
-                    'fontSize': '16px',
-                    'lineHeight': '1.6',
-                    'marginTop': '20px'
-                }
-            )
-        ]) if summary_content else html.Div()
+        # Generate summary of all articles, or just list them when there are only a few
+        unique_articles = dedupe_articles(articles)
+        if len(unique_articles) <= SHORT_LIST_MAX_ARTICLES:
+            summary_output = _render_summary(list_articles(unique_articles), heading="Headlines")
+        else:
+            set_progress("Summarizing...")
+            summary = summarize_news(unique_articles, stream_id)
+            summary_output = _render_summary(summary)
         
         return news_output, summary_output, articles
         
@@ -464,5 +872,18 @@ def fetch_and_display_news(n_clicks, selected_categories, search_term):
         logging.error(error_msg)
         return error_msg, "", None
 
+# Render the summary text streamed so far while the fetch callback is still running
+@app.callback(
+    Output('summary-output', 'children', allow_duplicate=True),
+    Input('summary-stream-interval', 'n_intervals'),
+    State('stream-id', 'data'),
+    prevent_initial_call=True
+)
+def update_summary_stream(n_intervals, stream_id):
+    partial = CACHE.get(SUMMARY_STREAM_PREFIX + stream_id) if stream_id else None
+    if not partial:
+        return dash.no_update
+    return _render_summary(partial)
+
 if __name__ == "__main__":
     app.run(debug=True, port=5002)